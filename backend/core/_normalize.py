@@ -0,0 +1,50 @@
+"""In-place L2 normalization for embedding batches handed to FAISS."""
+
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_rows_(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of a float32 matrix in place and return it.
+
+    Zero rows are left untouched instead of producing NaNs.
+    """
+    norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+    np.divide(vectors, norms[:, None], out=vectors)
+    return vectors
+
+
+def _unit_rows(raw: object) -> np.ndarray:
+    return normalize_rows_(np.array(raw, dtype=np.float32, ndmin=2))
+
+
+class NormalizedEmbeddings(Embeddings):
+    """Wrap an embedder so every vector it returns has unit L2 norm.
+
+    Vectors come back as C-contiguous float32 arrays, which the LangChain FAISS
+    wrapper accepts wherever it expects ``List[List[float]]``. This lets the
+    store run with ``normalize_L2=False`` while inner-product search still
+    ranks by cosine similarity.
+    """
+
+    def __init__(self, embedder: Embeddings) -> None:
+        self.embedder = embedder
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return _unit_rows(self.embedder.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return _unit_rows([self.embedder.embed_query(text)])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return _unit_rows(await self.embedder.aembed_documents(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return _unit_rows([await self.embedder.aembed_query(text)])[0]
@@ -44,7 +44,34 @@ class Settings:
         self.ollama_base_url: str = os.environ.get(
             "OLLAMA_BASE_URL", "http://localhost:11434"
         )
+        # How long Ollama keeps the chat model (and its prompt KV cache) loaded.
+        self.ollama_keep_alive: str = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
         self.search_k: int = int(os.environ.get("SEARCH_K", "4"))
+        self.embed_batch_size: int = int(os.environ.get("EMBED_BATCH_SIZE", "64"))
+        self.embed_workers: int = int(os.environ.get("EMBED_WORKERS", "4"))
+        # Stores start as an exact flat index and switch to VECTOR_INDEX once
+        # they hold VECTOR_INDEX_THRESHOLD vectors (or are expected to).
+        self.vector_index: str = os.environ.get("VECTOR_INDEX", "hnsw").lower()
+        self.vector_index_threshold: int = int(
+            os.environ.get("VECTOR_INDEX_THRESHOLD", "50000")
+        )
+        self.expected_corpus_size: int = int(
+            os.environ.get("EXPECTED_CORPUS_SIZE", "0")
+        )
+        # Queries are issued one at a time, so a few OpenMP threads is enough.
+        self.faiss_threads: int = int(
+            os.environ.get("FAISS_THREADS", min(4, os.cpu_count() or 1))
+        )
+        self.use_custom_scan: bool = (
+            os.environ.get("VECTOR_CUSTOM_SCAN", "false").lower() == "true"
+        )
+        self.warm_vector_store: bool = (
+            os.environ.get("WARM_VECTOR_STORE", "false").lower() == "true"
+        )
+        # Memory-mapped indexes are read-only; only enable for query workers.
+        self.vector_store_mmap: bool = (
+            os.environ.get("VECTOR_STORE_MMAP", "false").lower() == "true"
+        )
 
     def ensure_dirs(self) -> None:
         """Create required directories if they do not exist."""
@@ -68,7 +95,17 @@ class Settings:
             "embedding_model": self.embedding_model,
             "chat_model": self.chat_model,
             "ollama_base_url": self.ollama_base_url,
+            "ollama_keep_alive": self.ollama_keep_alive,
             "search_k": self.search_k,
+            "embed_batch_size": self.embed_batch_size,
+            "embed_workers": self.embed_workers,
+            "vector_index": self.vector_index,
+            "vector_index_threshold": self.vector_index_threshold,
+            "expected_corpus_size": self.expected_corpus_size,
+            "faiss_threads": self.faiss_threads,
+            "use_custom_scan": self.use_custom_scan,
+            "warm_vector_store": self.warm_vector_store,
+            "vector_store_mmap": self.vector_store_mmap,
         }
 
 
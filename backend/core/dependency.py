@@ -1,19 +1,135 @@
+import logging
+import math
+import pickle
+import threading
+import uuid
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, List, Optional, Tuple
 
 import faiss
+import numpy as np
 from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.docstore.base import AddableMixin
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
+from backend.core._normalize import NormalizedEmbeddings
 from backend.core.config import Settings, settings
 from backend.servies.model_service import ModelService, get_model_service
 from backend.utils.json_docstore import JsonDocStore
+from backend.utils.soa_docstore import SoADocStore
+
+logger = logging.getLogger(__name__)
+
+faiss.omp_set_num_threads(settings.faiss_threads)
+
+INDEX_NAME = "index"
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+SCAN_BLOCK_ROWS = 1 << 16
+TRAIN_SAMPLE_SIZE = 10_000
+
+
+def _to_faiss_batch(embs: Any) -> np.ndarray:
+    """Coerce embeddings to the C-contiguous float32 matrix FAISS consumes.
+
+    Arrays that already qualify pass through without a copy.
+    """
+    return np.ascontiguousarray(np.asarray(embs, dtype=np.float32))
+
+
+class LazyEmbeddings(Embeddings):
+    """Defer creating the real embedder until the first embed call.
+
+    Lets a loaded store serve without touching the embedding model until a
+    query or ingest actually needs it.
+    """
+
+    def __init__(self, factory: Callable[[], Embeddings]) -> None:
+        self._factory = factory
+        self._embedder: Optional[Embeddings] = None
+
+    @property
+    def embedder(self) -> Embeddings:
+        if self._embedder is None:
+            self._embedder = self._factory()
+        return self._embedder
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedder.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embedder.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embedder.aembed_query(text)
+
+
+class FaissStore(FAISS):
+    """LangChain FAISS store with a copy-free path for precomputed embeddings.
+
+    The base class funnels every add through ``np.array(embeddings)``, which
+    copies even a ready float32 matrix; ``add_vectors`` coerces the batch once
+    with ``_to_faiss_batch`` and adds it to the index directly.
+    """
+
+    def add_vectors(
+        self,
+        texts: List[str],
+        vectors: np.ndarray,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Add texts with a precomputed ``(len(texts), d)`` embedding matrix."""
+        if not isinstance(self.docstore, AddableMixin):
+            raise ValueError(
+                "If trying to add texts, the underlying docstore should support "
+                f"adding items, which {self.docstore} does not"
+            )
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = _to_faiss_batch(vectors)
+        if not (len(texts) == len(ids) == len(metadatas) == vectors.shape[0]):
+            raise ValueError(
+                f"Got {len(texts)} texts, {len(ids)} ids, {len(metadatas)} metadatas "
+                f"and {vectors.shape[0]} embeddings"
+            )
+        if len(ids) != len(set(ids)):
+            raise ValueError("Duplicate ids found in the ids list.")
+        if self._normalize_L2:
+            faiss.normalize_L2(vectors)
+        self.index.add(vectors)
+
+        self.docstore.add(
+            {
+                id_: Document(id=id_, page_content=t, metadata=m)
+                for id_, t, m in zip(ids, texts, metadatas)
+            }
+        )
+        starting_len = len(self.index_to_docstore_id)
+        self.index_to_docstore_id.update(
+            {starting_len + j: id_ for j, id_ in enumerate(ids)}
+        )
+        return ids
+
+
+_dirs_ready = False
+
+
+def _ensure_dirs_once(cfg: Settings) -> None:
+    global _dirs_ready
+    if not _dirs_ready:
+        cfg.ensure_dirs()
+        _dirs_ready = True
 
 
 @lru_cache
 def get_settings() -> Settings:
-    settings.ensure_dirs()
+    _ensure_dirs_once(settings)
     return settings
 
 
@@ -24,24 +140,259 @@ def get_model(cfg: Optional[Settings] = None) -> ModelService:
 
 
 def _vector_dim(model_service: ModelService) -> int:
-    sample = model_service.get_embedder().embed_query("dimension check")
-    return len(sample)
+    return model_service.embedding_dim
+
+
+def _new_index(cfg: Settings, dim: int, n: int) -> faiss.Index:
+    """Pick the FAISS index for a corpus of ``n`` vectors.
+
+    Small corpora stay on an exact flat scan; once ``n`` reaches the configured
+    threshold ``cfg.vector_index`` decides what replaces it: an HNSW graph for
+    sub-linear search, an 8-bit scalar quantizer that moves a quarter of the
+    bytes per scanned vector, or an inverted file with ``4 * sqrt(n)`` lists
+    (capped so each list has enough points to train on).
+    SQ8 and IVF indexes are returned untrained.
+    """
+    if n >= cfg.vector_index_threshold:
+        if cfg.vector_index == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            return index
+        if cfg.vector_index == "sq8":
+            return faiss.IndexScalarQuantizer(
+                dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        if cfg.vector_index == "ivf":
+            # The coarse quantizer must use the same metric as the index.
+            quantizer = faiss.IndexFlatIP(dim)
+            # k-means needs at least ~39 training points per list.
+            nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+            index = faiss.IndexIVFFlat(
+                quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+            index.nprobe = _ivf_nprobe(nlist)
+            return index
+    return faiss.IndexFlatIP(dim)
+
+
+def _ivf_nprobe(nlist: int) -> int:
+    return max(8, nlist // 32)
+
+
+def _maybe_upgrade_index(store: FAISS, cfg: Settings) -> bool:
+    """Re-index a flat store into the configured index once it is large enough.
+
+    Until then the flat index doubles as the buffer that quantized indexes are
+    trained from. Vectors are re-added in their original order, so
+    ``index_to_docstore_id`` stays valid. Returns True when the store's index
+    was replaced.
+    """
+    index = store.index
+    if not isinstance(index, faiss.IndexFlat):
+        return False
+    upgraded = _new_index(cfg, index.d, index.ntotal)
+    if isinstance(upgraded, faiss.IndexFlat):
+        return False
+    vectors = index.reconstruct_n(0, index.ntotal)
+    if not upgraded.is_trained:
+        # k-means wants ~40 points per inverted list.
+        sample = max(TRAIN_SAMPLE_SIZE, 40 * getattr(upgraded, "nlist", 0))
+        upgraded.train(vectors[:sample])
+    upgraded.add(vectors)
+    store.index = upgraded
+    logger.info(
+        "Re-indexed %d vectors from %s into %s",
+        index.ntotal,
+        type(index).__name__,
+        type(upgraded).__name__,
+    )
+    return True
+
+
+def _search_params(index: faiss.Index, k: int) -> Optional[faiss.SearchParameters]:
+    """Size the ANN search breadth for a query that wants ``k`` results.
+
+    Returned as per-call parameters rather than set on the shared index, so
+    concurrent searches with different ``k`` do not override each other.
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=max(64, 4 * k))
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(
+            nprobe=max(_ivf_nprobe(index.nlist), min(k, index.nlist))
+        )
+    return None
+
+
+def _flat_scan(
+    index: faiss.IndexFlat, queries: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact inner-product search over a flat index using blocked matmuls.
+
+    The stored vectors are viewed in place and scanned in blocks of
+    ``SCAN_BLOCK_ROWS``; each block's top-k is merged into the running best.
+    Output matches ``index.search``: padded with -1 ids when ``k > ntotal``.
+    """
+    n, dim = index.ntotal, index.d
+    nq = queries.shape[0]
+    best_scores = np.full((nq, k), -np.finfo(np.float32).max, dtype=np.float32)
+    best_ids = np.full((nq, k), -1, dtype=np.int64)
+    if n == 0 or k <= 0:
+        return best_scores, best_ids
+
+    xb = faiss.rev_swig_ptr(index.get_xb(), n * dim).reshape(n, dim)
+    rows = np.arange(nq)[:, None]
+    for start in range(0, n, SCAN_BLOCK_ROWS):
+        block_scores = queries @ xb[start : start + SCAN_BLOCK_ROWS].T
+        block_ids = np.arange(start, start + block_scores.shape[1], dtype=np.int64)
+        cand_scores = np.concatenate([best_scores, block_scores], axis=1)
+        cand_ids = np.concatenate(
+            [best_ids, np.broadcast_to(block_ids, block_scores.shape)], axis=1
+        )
+        top = np.argpartition(-cand_scores, k - 1, axis=1)[:, :k]
+        best_scores, best_ids = cand_scores[rows, top], cand_ids[rows, top]
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return best_scores[rows, order], best_ids[rows, order]
+
+
+def search_index(
+    store: FAISS, queries: np.ndarray, k: int, cfg: Optional[Settings] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Run a raw top-k search against the store's FAISS index.
+
+    With ``cfg.use_custom_scan`` exact inner-product flat indexes are scanned
+    with numpy/BLAS instead of ``IndexFlatIP.search``, which only parallelises
+    across queries. HNSW and IVF searches get their breadth sized to ``k``.
+    """
+    cfg = cfg or get_settings()
+    queries = _to_faiss_batch(queries)
+    index = store.index
+    if (
+        cfg.use_custom_scan
+        and isinstance(index, faiss.IndexFlat)
+        and index.metric_type == faiss.METRIC_INNER_PRODUCT
+    ):
+        return _flat_scan(index, queries, k)
+    return index.search(queries, k, params=_search_params(index, k))
 
 
 def _build_new_store(cfg: Settings, model_service: ModelService) -> FAISS:
     dim = _vector_dim(model_service)
-    index = faiss.IndexFlatIP(dim)
-    return FAISS(
-        embedding_function=model_service.get_embedder(),
+    index = _new_index(cfg, dim, cfg.expected_corpus_size)
+    if not index.is_trained:
+        # Buffer in a flat index until there is data to train on.
+        index = faiss.IndexFlatIP(dim)
+    # Vectors are normalized in place by the embedder wrapper, so FAISS does not
+    # need its own normalize_L2 pass on every add/search.
+    return FaissStore(
+        embedding_function=NormalizedEmbeddings(model_service.get_embedder()),
         index=index,
-        docstore=InMemoryDocstore({}),
+        docstore=SoADocStore(),
         index_to_docstore_id={},
-        normalize_L2=True,
+        normalize_L2=False,
+    )
+
+
+def _load_store(store_path: Path, cfg: Settings, model_service: ModelService) -> FAISS:
+    """Load a persisted store, reading the FAISS index directly.
+
+    With ``cfg.vector_store_mmap`` the index file is memory-mapped so pages are
+    faulted in on demand instead of being copied into RSS up front. Such an
+    index cannot grow, so this mode is meant for query-only workers.
+    """
+    io_flags = (
+        getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        if cfg.vector_store_mmap
+        else 0
+    )
+    store = load_local_compact(
+        store_path,
+        NormalizedEmbeddings(LazyEmbeddings(model_service.get_embedder)),
+        io_flags,
+    )
+    logger.info(
+        "Loaded vector store with %d vectors (dim=%d)", store.index.ntotal, store.index.d
+    )
+    return store
+
+
+def save_local_compact(store: FAISS, path: Path) -> None:
+    """Persist ``store`` without pickling it.
+
+    Writes the raw FAISS index to ``index.faiss`` and the docstore columns plus,
+    per vector, the docstore row it maps to into ``index.npz``. A legacy
+    ``index.pkl`` is removed once both files are in place.
+
+    Each file is swapped in atomically, but the pair is not. ``index.npz`` goes
+    first: the store only grows by appending, so if the index swap never
+    happens, the old index maps onto a prefix of the new rows.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    docstore = store.docstore
+    if not isinstance(docstore, SoADocStore):
+        # Stores created before the column docstore; convert on first save.
+        docstore = SoADocStore()
+        docstore.add(
+            {_id: store.docstore.search(_id) for _id in store.index_to_docstore_id.values()}
+        )
+        store.docstore = docstore
+
+    ntotal = store.index.ntotal
+    arrays = docstore.to_arrays()
+    arrays["vector_rows"] = np.fromiter(
+        (docstore.rows[store.index_to_docstore_id[i]] for i in range(ntotal)),
+        dtype=np.int64,
+        count=ntotal,
+    )
+
+    columns_file = path / f"{INDEX_NAME}.npz"
+    tmp = columns_file.with_name(columns_file.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    tmp.replace(columns_file)
+
+    index_file = path / f"{INDEX_NAME}.faiss"
+    tmp = index_file.with_name(index_file.name + ".tmp")
+    faiss.write_index(store.index, str(tmp))
+    tmp.replace(index_file)
+
+    (path / f"{INDEX_NAME}.pkl").unlink(missing_ok=True)
+
+
+def load_local_compact(path: Path, embeddings: Embeddings, io_flags: int = 0) -> FaissStore:
+    """Load a store written by :func:`save_local_compact`.
+
+    Falls back to the pickle written by ``FAISS.save_local`` for stores that
+    predate the compact format; the next persist rewrites them.
+    """
+    index = faiss.read_index(str(path / f"{INDEX_NAME}.faiss"), io_flags)
+    columns_file = path / f"{INDEX_NAME}.npz"
+    if columns_file.exists():
+        with np.load(columns_file, allow_pickle=False) as arrays:
+            docstore = SoADocStore.from_arrays(arrays)
+            # Rows past ntotal belong to a save whose index swap never landed.
+            vector_rows = arrays["vector_rows"][: index.ntotal].tolist()
+        index_to_docstore_id = {i: docstore.keys[row] for i, row in enumerate(vector_rows)}
+    else:
+        # The pickle is written by this application's older releases.
+        with open(path / f"{INDEX_NAME}.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        if isinstance(docstore, SoADocStore):
+            # Pickled without its string-id cache; rebuild from the columns.
+            docstore = SoADocStore.from_arrays(docstore.to_arrays())
+    return FaissStore(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+        normalize_L2=False,
     )
 
 
 # Cache for vector store instance
 _vector_store_cache: Optional[FAISS] = None
+_vector_store_lock = threading.Lock()
 
 
 def get_vector_store(cfg: Optional[Settings] = None) -> FAISS:
@@ -53,27 +404,31 @@ def get_vector_store(cfg: Optional[Settings] = None) -> FAISS:
     global _vector_store_cache
     if _vector_store_cache is not None:
         return _vector_store_cache
-    
-    cfg = cfg or get_settings()
-    model_service = get_model(cfg)
-    store_path: Path = cfg.vector_store_path
-
-    if store_path.exists() and any(store_path.iterdir()):
-        _vector_store_cache = FAISS.load_local(
-            str(store_path),
-            model_service.get_embedder(),
-            allow_dangerous_deserialization=True,
-        )
-    else:
-        _vector_store_cache = _build_new_store(cfg, model_service)
-    
+
+    with _vector_store_lock:
+        if _vector_store_cache is not None:
+            return _vector_store_cache
+
+        cfg = cfg or get_settings()
+        model_service = get_model(cfg)
+        store_path: Path = cfg.vector_store_path
+
+        if store_path.exists() and any(store_path.iterdir()):
+            store = _load_store(store_path, cfg, model_service)
+            if not cfg.vector_store_mmap and _maybe_upgrade_index(store, cfg):
+                persist_vector_store(store, cfg)
+        else:
+            store = _build_new_store(cfg, model_service)
+
+        _vector_store_cache = store
     return _vector_store_cache
 
 
 def persist_vector_store(store: FAISS, cfg: Optional[Settings] = None) -> None:
     cfg = cfg or get_settings()
-    cfg.ensure_dirs()
-    store.save_local(str(cfg.vector_store_path))
+    _ensure_dirs_once(cfg)
+    _maybe_upgrade_index(store, cfg)
+    save_local_compact(store, cfg.vector_store_path)
 
 
 @lru_cache
@@ -81,3 +436,18 @@ def get_docstore(cfg: Optional[Settings] = None) -> JsonDocStore:
     cfg = cfg or get_settings()
     return JsonDocStore(Path(cfg.docstore_path))
 
+
+def _warm_vector_store() -> None:
+    try:
+        get_vector_store()
+    except Exception:
+        logger.exception("Background vector store warm-up failed")
+
+
+# Start loading the index while the server finishes booting so the first
+# query does not pay for the disk read.
+if settings.warm_vector_store:
+    _loader_thread = threading.Thread(
+        target=_warm_vector_store, name="vector-store-warmup", daemon=True
+    )
+    _loader_thread.start()
@@ -1,6 +1,8 @@
 """Main LangGraph graph definition for the RAG agent."""
 
+import asyncio
 import logging
+import threading
 from typing import List, Literal, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
@@ -30,6 +32,32 @@ Guidelines:
 
 Current knowledge base status: Ready to receive queries and documents."""
 
+# Kept byte-identical across turns so the model server can reuse the cached
+# prompt prefix; never interpolate per-request data into it.
+_SYSTEM_MSG = SystemMessage(content=SYSTEM_PROMPT)
+
+
+_bound_llm_cache = None
+_bound_llm_lock = threading.Lock()
+
+
+def _bound_llm():
+    """Return the chat model with RAG tools bound, built once per process.
+
+    Concurrent first turns can race here, so construction is guarded by a lock
+    to avoid building the chat model twice.
+    """
+    global _bound_llm_cache
+    if _bound_llm_cache is not None:
+        return _bound_llm_cache
+
+    with _bound_llm_lock:
+        if _bound_llm_cache is None:
+            _bound_llm_cache = (
+                get_model(get_settings()).get_chat_model().bind_tools(rag_tools)
+            )
+    return _bound_llm_cache
+
 
 async def agent_node(state: RAGState, config: RunnableConfig) -> dict:
     """Main agent node that processes messages and decides on actions.
@@ -37,16 +65,11 @@ async def agent_node(state: RAGState, config: RunnableConfig) -> dict:
     This node invokes the LLM with the current conversation and available tools.
     The LLM can either respond directly or call tools for RAG operations.
     """
-    cfg = get_settings()
-    model_service = get_model(cfg)
-    llm = model_service.get_chat_model()
-
-    # Bind tools to the model
-    llm_with_tools = llm.bind_tools(rag_tools)
+    # The first call builds the chat model; keep that off the event loop.
+    llm_with_tools = _bound_llm_cache or await asyncio.to_thread(_bound_llm)
 
     # Prepare messages with system prompt
-    messages: List[BaseMessage] = [SystemMessage(content=SYSTEM_PROMPT)]
-    messages.extend(state["messages"])
+    messages: List[BaseMessage] = [_SYSTEM_MSG, *state["messages"]]
 
     # Invoke the model
     response = await llm_with_tools.ainvoke(messages, config)
@@ -64,13 +87,11 @@ def should_continue(state: RAGState) -> Literal["tools", "__end__"]:
     if not messages:
         return END
 
-    last_message = messages[-1]
+    # Only AIMessages carry tool_calls; anything else routes to END.
+    return "tools" if getattr(messages[-1], "tool_calls", None) else END
 
-    # Check if the last message has tool calls
-    if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-        return "tools"
 
-    return END
+_AGENT_ROUTES = {"tools": "tools", END: END}
 
 
 def create_rag_graph() -> StateGraph:
@@ -93,14 +114,7 @@ def create_rag_graph() -> StateGraph:
     workflow.set_entry_point("agent")
 
     # Add conditional edge from agent
-    workflow.add_conditional_edges(
-        "agent",
-        should_continue,
-        {
-            "tools": "tools",
-            END: END,
-        },
-    )
+    workflow.add_conditional_edges("agent", should_continue, _AGENT_ROUTES)
 
     # Add edge from tools back to agent
     workflow.add_edge("tools", "agent")
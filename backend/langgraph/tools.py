@@ -1,6 +1,8 @@
 """LangGraph tools for the RAG agent."""
 
+import asyncio
 import logging
+import threading
 from pathlib import Path
 from typing import Optional
 
@@ -13,6 +15,7 @@ from backend.core.dependency import (
     get_settings,
     get_vector_store,
 )
+from backend.models.schemas import ContextChunk, IngestArgs, SearchArgs
 from backend.servies.chat_service import ChatService
 from backend.servies.file_service import PDFFileService
 
@@ -20,29 +23,47 @@ logger = logging.getLogger(__name__)
 
 # Global service instances (initialized lazily)
 _chat_service: Optional[ChatService] = None
+_chat_service_lock = threading.Lock()
 
 
 def _get_chat_service() -> ChatService:
-    """Get or create a ChatService instance."""
+    """Get or create a ChatService instance.
+
+    Concurrent tool calls can race here, so construction is guarded by a lock
+    to avoid building (and loading models for) the service twice.
+    """
     global _chat_service
-    if _chat_service is None:
-        cfg = get_settings()
-        vector_store = get_vector_store(cfg)
-        docstore = get_docstore(cfg)
-        model_service = get_model(cfg)
-        file_service = PDFFileService()
-        _chat_service = ChatService(
-            cfg=cfg,
-            vector_store=vector_store,
-            file_service=file_service,
-            model_service=model_service,
-            docstore=docstore,
-        )
+    if _chat_service is not None:
+        return _chat_service
+
+    with _chat_service_lock:
+        if _chat_service is None:
+            cfg = get_settings()
+            vector_store = get_vector_store(cfg)
+            docstore = get_docstore(cfg)
+            model_service = get_model(cfg)
+            file_service = PDFFileService()
+            _chat_service = ChatService(
+                cfg=cfg,
+                vector_store=vector_store,
+                file_service=file_service,
+                model_service=model_service,
+                docstore=docstore,
+            )
     return _chat_service
 
 
-@tool
-def ingest_document(file_path: str) -> str:
+def _fmt_src(chunk: ContextChunk) -> str:
+    """Format the source suffix shown after a result's index."""
+    if not chunk.source:
+        return ""
+    page = f", Page {chunk.page_number}" if chunk.page_number else ""
+    return f" (Source: {chunk.source}{page})"
+
+
+# Explicit args schemas spare LangChain from introspecting signatures/docstrings.
+@tool("ingest_document", args_schema=IngestArgs)
+async def ingest_document(file_path: str) -> str:
     """Ingest a PDF document into the knowledge base.
 
     This tool processes a PDF file, extracts text, tables, and images,
@@ -62,7 +83,8 @@ def ingest_document(file_path: str) -> str:
             return f"Error: File must be a PDF. Got {path.suffix}"
 
         svc = _get_chat_service()
-        result = svc.ingest(str(path))
+        # Parsing, summarising and embedding are blocking; keep them off the event loop.
+        result = await asyncio.to_thread(svc.ingest, str(path))
 
         return (
             f"Successfully ingested '{path.name}': "
@@ -74,7 +96,7 @@ def ingest_document(file_path: str) -> str:
         return f"Error ingesting document: {str(e)}"
 
 
-@tool
+@tool("search_knowledge_base", args_schema=SearchArgs)
 def search_knowledge_base(query: str, k: int = 4) -> str:
     """Search the knowledge base for relevant information.
 
@@ -90,22 +112,15 @@ def search_knowledge_base(query: str, k: int = 4) -> str:
     """
     try:
         svc = _get_chat_service()
-        context_chunks = svc.show_context(query, k=k)
+        context_chunks = svc.show_context(query, k)
 
         if not context_chunks:
             return "No relevant documents found in the knowledge base."
 
-        results = []
-        for i, chunk in enumerate(context_chunks, 1):
-            source_info = ""
-            if chunk.source:
-                source_info += f" (Source: {chunk.source}"
-                if chunk.page_number:
-                    source_info += f", Page {chunk.page_number}"
-                source_info += ")"
-            results.append(f"[{i}]{source_info}\n{chunk.text}")
-
-        return "\n\n---\n\n".join(results)
+        return "\n\n---\n\n".join(
+            f"[{i}]{_fmt_src(chunk)}\n{chunk.text}"
+            for i, chunk in enumerate(context_chunks, 1)
+        )
     except Exception as e:
         logger.exception("Error searching knowledge base: %s", e)
         return f"Error searching knowledge base: {str(e)}"
@@ -21,10 +21,20 @@ class ChatRequest(BaseModel):
     k: int = Field(4, description="Number of chunks to fetch from the vector store.")
 
 
+class IngestArgs(BaseModel):
+    file_path: str = Field(..., description="The absolute path to the PDF file to ingest.")
+
+
+class SearchArgs(BaseModel):
+    query: str = Field(..., description="The search query to find relevant documents.")
+    k: int = Field(4, description="Number of results to return (default: 4).")
+
+
 class ContextChunk(BaseModel):
     text: str
     page_number: Optional[int] = None
     source: Optional[str] = None
+    score: Optional[float] = Field(None, description="Relevance in [0, 1], when known.")
 
 
 class ChatResponse(BaseModel):
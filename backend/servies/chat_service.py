@@ -1,19 +1,19 @@
 import logging
 import time
 import uuid
-from typing import List, Optional, Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Any, Dict, Tuple
 
+import numpy as np
 from langchain_core.documents import Document
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
-from langchain_core.vectorstores import VectorStore
-from langchain_core.retrievers import BaseRetriever
 
 from backend.core.config import Settings
-from backend.core.dependency import persist_vector_store
+from backend.core.dependency import FaissStore, persist_vector_store, search_index
 from backend.models.schemas import ChatRequest, ChatResponse, ContextChunk, IngestResponse
 from backend.servies.interface.chat_interface import ChatInterface
 from backend.servies.interface.file_interface import FileInterface
@@ -44,7 +44,7 @@ class ChatService(ChatInterface):
     def __init__(
         self,
         cfg: Settings,
-        vector_store: VectorStore,
+        vector_store: FaissStore,
         file_service: FileInterface,
         model_service: ModelService,
         docstore: JsonDocStore,
@@ -55,12 +55,13 @@ class ChatService(ChatInterface):
         self.file_service = file_service
         self.model_service = model_service
         self.docstore = docstore
-        # Use vector store's built-in retriever (compatible with LangChain 0.3+)
-        self.retriever: BaseRetriever = self.vector_store.as_retriever(
-            search_kwargs={"k": self.cfg.search_k}
-        )
 
     def ingest(self, file_path: str) -> IngestResponse:
+        if self.cfg.vector_store_mmap:
+            raise RuntimeError(
+                "Vector store is memory-mapped read-only (VECTOR_STORE_MMAP=true); "
+                "ingest from a worker without it."
+            )
         self.logger.info("Ingest started for %s", file_path)
         t_ingest = time.perf_counter()
 
@@ -164,7 +165,7 @@ class ChatService(ChatInterface):
             len(parents),
         )
 
-        ids = self.vector_store.add_documents(child_docs) if child_docs else []
+        ids = self._index_documents(child_docs) if child_docs else []
         if child_docs:
             persist_vector_store(self.vector_store, self.cfg)
             self.docstore.mset(parents)
@@ -195,14 +196,69 @@ class ChatService(ChatInterface):
             vector_store_path=str(self.cfg.vector_store_path),
         )
 
-    def _format_context(self, docs: List[Document]) -> List[ContextChunk]:
+    def _embed_batched(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in fixed-size batches into one contiguous float32 matrix.
+
+        Batches are sent concurrently so the embedding server can overlap them.
+        """
+        embedder = self.vector_store.embedding_function
+        size = max(1, self.cfg.embed_batch_size)
+        batches = [texts[i : i + size] for i in range(0, len(texts), size)]
+        with ThreadPoolExecutor(max_workers=max(1, self.cfg.embed_workers)) as pool:
+            parts = list(pool.map(embedder.embed_documents, batches))
+        return np.concatenate(
+            [np.asarray(part, dtype=np.float32) for part in parts]
+        )
+
+    def _index_documents(self, docs: List[Document]) -> List[str]:
+        t_embed = time.perf_counter()
+        texts = [d.page_content for d in docs]
+        embeddings = self._embed_batched(texts)
+        self.logger.info(
+            "Embedded %d docs in %.2fs (batch_size=%d)",
+            len(texts),
+            time.perf_counter() - t_embed,
+            self.cfg.embed_batch_size,
+        )
+        return self.vector_store.add_vectors(
+            texts,
+            embeddings,
+            metadatas=[d.metadata for d in docs],
+            ids=[d.metadata["doc_id"] for d in docs],
+        )
+
+    def _retrieve(self, question: str, k: int) -> List[Tuple[Document, float]]:
+        """Search the FAISS index directly and return hits with relevance scores.
+
+        Skips the retriever/LangChain wrapper layers; the query embedding is
+        already unit-normalized, so inner-product scores are cosine similarities,
+        mapped here from [-1, 1] onto [0, 1]. Hits come back best first.
+        """
+        store = self.vector_store
+        query_vec = np.asarray(
+            [store.embedding_function.embed_query(question)], dtype=np.float32
+        )
+        scores, ids = search_index(store, query_vec, k, self.cfg)
+        relevance = np.clip((scores[0] + 1.0) * 0.5, 0.0, 1.0)
+
+        hits: List[Tuple[Document, float]] = []
+        for idx, score in zip(ids[0].tolist(), relevance.tolist()):
+            if idx < 0:
+                continue  # fewer than k vectors in the index
+            doc = store.docstore.search(store.index_to_docstore_id[idx])
+            if isinstance(doc, Document):
+                hits.append((doc, score))
+        return hits
+
+    def _format_context(self, hits: List[Tuple[Document, float]]) -> List[ContextChunk]:
         return [
             ContextChunk(
                 text=d.page_content,
                 page_number=d.metadata.get("page_number"),
                 source=d.metadata.get("source"),
+                score=score,
             )
-            for d in docs
+            for d, score in hits
         ]
 
     @staticmethod
@@ -277,8 +333,8 @@ Answer format:
 
     def answer(self, question: str, k: int = 4) -> ChatResponse:
         t_answer = time.perf_counter()
-        self.retriever.search_kwargs = {"k": k or self.cfg.search_k}
-        docs: List[Document] = self.retriever.invoke(question)
+        hits = self._retrieve(question, k or self.cfg.search_k)
+        docs = [d for d, _ in hits]
         self.logger.info(
             "Retrieved %d docs for question (k=%d): %.120s",
             len(docs),
@@ -291,10 +347,8 @@ Answer format:
             time.perf_counter() - t_answer,
             question,
         )
-        return ChatResponse(answer=answer, context=self._format_context(docs))
+        return ChatResponse(answer=answer, context=self._format_context(hits))
 
     def show_context(self, question: str, k: int = 4) -> List[ContextChunk]:
         """Helper to fetch and return the context that would be used for a question."""
-        self.retriever.search_kwargs = {"k": k or self.cfg.search_k}
-        docs: List[Document] = self.retriever.invoke(question)
-        return self._format_context(docs)
+        return self._format_context(self._retrieve(question, k or self.cfg.search_k))
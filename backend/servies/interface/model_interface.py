@@ -9,6 +9,10 @@ class ModelInterface(Protocol):
     def get_embedder(self) -> OllamaEmbeddings:
         """Return (and cache) an embedding model."""
 
+    @property
+    def embedding_dim(self) -> int:
+        """Return the dimension of vectors produced by the embedder."""
+
     def get_chat_model(self) -> ChatOllama:
         """Return (and cache) a chat model for answering questions."""
 
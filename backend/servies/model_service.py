@@ -14,6 +14,7 @@ class ModelService(ModelInterface):
         self.cfg = cfg
         self._embedder: Optional[OllamaEmbeddings] = None
         self._chat: Optional[ChatOllama] = None
+        self._embedding_dim: Optional[int] = None
 
     def get_embedder(self) -> OllamaEmbeddings:
         if self._embedder is None:
@@ -23,6 +24,13 @@ class ModelService(ModelInterface):
             )
         return self._embedder
 
+    @property
+    def embedding_dim(self) -> int:
+        """Output dimension of the embedder, probed once and cached."""
+        if self._embedding_dim is None:
+            self._embedding_dim = len(self.get_embedder().embed_query("dimension check"))
+        return self._embedding_dim
+
     def get_chat_model(self) -> ChatOllama:
         if self._chat is None:
             # Derive chat model name if using an embedding model naming convention.
@@ -31,6 +39,7 @@ class ModelService(ModelInterface):
                 model=chat_model,
                 base_url=self.cfg.ollama_base_url,
                 temperature=0,
+                keep_alive=self.cfg.ollama_keep_alive,
             )
         return self._chat
 
@@ -1,53 +1,161 @@
 import json
+import logging
+import mmap
+import os
+import struct
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Sequence, Tuple, Union, Iterator
 
 from langchain_core.documents import Document
 from langchain_core.stores import BaseStore
 
+try:
+    import orjson
+
+    def _dumps(obj: object) -> bytes:
+        # OPT_NON_STR_KEYS matches json.dumps, which stringifies int/float keys.
+        return orjson.dumps(
+            obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: object) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    _loads = json.loads
+
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"JDS1"
+# Record header: payload length, key length. A zero-length payload deletes the key.
+_HEADER = struct.Struct("<IH")
+
 
 class JsonDocStore(BaseStore[str, Document]):
-    """File-backed docstore implementing the BaseStore interface."""
+    """File-backed docstore implementing the BaseStore interface.
+
+    Documents live in an append-only log: a magic header followed by records of
+    a little-endian (payload length, key length) header, the UTF-8 key and a
+    JSON payload. Only a key -> (offset, length) index is kept in memory, built
+    on open without decoding any payloads; lookups decode a single slice of a
+    memory-mapped view of the file. Stores written in the older single-JSON
+    format are converted on open.
+    """
 
     def __init__(self, path: Path) -> None:
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.store: Dict[str, Document] = {}
-        if self.path.exists():
-            try:
-                raw = json.loads(self.path.read_text(encoding="utf-8"))
-                self.store = {
-                    k: Document(page_content=v["page_content"], metadata=v.get("metadata", {}))
-                    for k, v in raw.items()
-                }
-            except Exception:
-                self.store = {}
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._mm: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+        if self.path.exists() and self.path.stat().st_size:
+            with self.path.open("rb") as f:
+                is_log = f.read(len(_MAGIC)) == _MAGIC
+            if is_log:
+                self._load_index()
+            else:
+                self._migrate_legacy()
+        else:
+            self.path.write_bytes(_MAGIC)
+
+    def _load_index(self) -> None:
+        data = self._map()
+        offset = len(_MAGIC)
+        while offset + _HEADER.size <= len(data):
+            length, key_len = _HEADER.unpack_from(data, offset)
+            key_start = offset + _HEADER.size
+            start = key_start + key_len
+            if start + length > len(data):
+                break  # torn trailing write
+            key = str(data[key_start:start], "utf-8")
+            if length:
+                self._index[key] = (start, length)
+            else:
+                self._index.pop(key, None)
+            offset = start + length
+        if offset < len(data):
+            # Drop the torn record so later appends start on a record boundary.
+            self._close_map()
+            os.truncate(self.path, offset)
+
+    def _migrate_legacy(self) -> None:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            # Keep the unreadable file for inspection instead of overwriting it.
+            backup = self.path.with_name(self.path.name + ".bak")
+            logger.exception(
+                "Could not parse legacy docstore %s; moved it to %s", self.path, backup
+            )
+            self.path.replace(backup)
+            raw = {}
+        # Build the log next to the legacy file and swap it in once complete.
+        legacy, tmp = self.path, self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(_MAGIC)
+        self.path = tmp
+        try:
+            self._append([(k, _dumps(v)) for k, v in raw.items()])
+        finally:
+            self.path = legacy
+        tmp.replace(legacy)
+
+    def _append(self, records: List[Tuple[str, bytes]]) -> None:
+        if not records:
+            return
+        with self._lock, self.path.open("ab") as f:
+            offset = f.tell()
+            for key, payload in records:
+                key_bytes = key.encode("utf-8")
+                f.write(_HEADER.pack(len(payload), len(key_bytes)))
+                f.write(key_bytes)
+                f.write(payload)
+                start = offset + _HEADER.size + len(key_bytes)
+                if payload:
+                    self._index[key] = (start, len(payload))
+                else:
+                    self._index.pop(key, None)
+                offset = start + len(payload)
+            self._close_map()
+
+    def _close_map(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _map(self) -> mmap.mmap:
+        if self._mm is None:
+            with self.path.open("rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def _get(self, key: str) -> Optional[Document]:
+        loc = self._index.get(key)
+        if loc is None:
+            return None
+        start, length = loc
+        with self._lock:
+            raw = self._map()[start : start + length]
+        v = _loads(raw)
+        return Document(page_content=v["page_content"], metadata=v.get("metadata", {}))
 
     def mget(self, keys: Sequence[str]) -> List[Optional[Document]]:
-        return [self.store.get(k) for k in keys]
+        return [self._get(k) for k in keys]
 
     def mset(self, key_value_pairs: Sequence[Tuple[str, Document]]) -> None:
-        for key, value in key_value_pairs:
-            self.store[key] = value
-        self._persist()
+        self._append(
+            [
+                (key, _dumps({"page_content": value.page_content, "metadata": value.metadata}))
+                for key, value in key_value_pairs
+            ]
+        )
 
     def mdelete(self, keys: Sequence[str]) -> None:
-        for k in keys:
-            if k in self.store:
-                del self.store[k]
-        self._persist()
+        self._append([(k, b"") for k in keys if k in self._index])
 
     def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
         if prefix is None:
-            return iter(self.store.keys())
-        return (k for k in self.store.keys() if k.startswith(prefix))
-
-    def _persist(self) -> None:
-        payload = {
-            k: {"page_content": v.page_content, "metadata": v.metadata}
-            for k, v in self.store.items()
-        }
-        self.path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+            return iter(list(self._index.keys()))
+        return (k for k in list(self._index.keys()) if k.startswith(prefix))
@@ -0,0 +1,178 @@
+import json
+from array import array
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+
+class SoADocStore(Docstore, AddableMixin):
+    """Column-oriented docstore for the FAISS vector store.
+
+    Instead of one ``Document`` (plus metadata dict) per chunk, rows are kept in
+    parallel typed arrays: page numbers, interned ``source``/``modality`` ids and
+    offsets into a single UTF-8 text buffer. Documents are rebuilt on lookup.
+    Metadata keys outside those columns, and values a column cannot hold (e.g.
+    a non-integer page), are kept in a sparse per-row dict.
+    """
+
+    _NONE = -1
+    # Column value for a metadata key the document did not have.
+    _ABSENT = -2
+    _PAGE_MAX = 2**31 - 1
+
+    def __init__(self) -> None:
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.page = array("i")
+        self.source_ids = array("i")
+        self.modality_ids = array("i")
+        self.key_is_doc_id = array("b")
+        self.string_table: List[str] = []
+        self.text_offsets = array("q", [0])
+        self.text_buf = bytearray()
+        self.extra: Dict[int, Dict[str, Any]] = {}
+        self._string_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Export copies of the columns as numpy arrays, e.g. for ``np.savez``.
+
+        Copies rather than buffer views, so a concurrent ``add`` can still grow
+        the columns while the export is held. Keys, the string table and extra
+        metadata go into one UTF-8 JSON blob, so the result can be reloaded
+        with ``allow_pickle=False``.
+        """
+        meta = {
+            "keys": self.keys,
+            "strings": self.string_table,
+            "extra": {str(row): m for row, m in self.extra.items()},
+        }
+        return {
+            "live": np.array([k in self.rows for k in self.keys], dtype=np.bool_),
+            "page": np.array(self.page, dtype=np.int32),
+            "source_ids": np.array(self.source_ids, dtype=np.int32),
+            "modality_ids": np.array(self.modality_ids, dtype=np.int32),
+            "key_is_doc_id": np.array(self.key_is_doc_id, dtype=np.int8),
+            "text_offsets": np.array(self.text_offsets, dtype=np.int64),
+            "text_buf": np.frombuffer(bytes(self.text_buf), dtype=np.uint8),
+            "meta": np.frombuffer(
+                json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8
+            ),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> "SoADocStore":
+        """Rebuild a docstore from the output of :meth:`to_arrays`."""
+        store = cls()
+        meta = json.loads(arrays["meta"].tobytes())
+        store.keys = meta["keys"]
+        store.rows = {k: i for i, (k, live) in enumerate(zip(store.keys, arrays["live"])) if live}
+        store.string_table = meta["strings"]
+        store._string_ids = {s: i for i, s in enumerate(store.string_table)}
+        store.extra = {int(row): m for row, m in meta["extra"].items()}
+        store.page = array("i", arrays["page"].astype(np.int32).tobytes())
+        store.source_ids = array("i", arrays["source_ids"].astype(np.int32).tobytes())
+        store.modality_ids = array("i", arrays["modality_ids"].astype(np.int32).tobytes())
+        store.key_is_doc_id = array("b", arrays["key_is_doc_id"].astype(np.int8).tobytes())
+        store.text_offsets = array("q", arrays["text_offsets"].astype(np.int64).tobytes())
+        store.text_buf = bytearray(arrays["text_buf"].tobytes())
+        return store
+
+    def _intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return self._NONE
+        idx = self._string_ids.get(value)
+        if idx is None:
+            idx = len(self.string_table)
+            self.string_table.append(value)
+            self._string_ids[value] = idx
+        return idx
+
+    def _lookup(self, idx: int) -> Optional[str]:
+        return None if idx == self._NONE else self.string_table[idx]
+
+    def _take_page(self, meta: Dict[str, Any]) -> int:
+        """Pop ``page_number`` from ``meta`` if it fits the page column."""
+        if "page_number" not in meta:
+            return self._ABSENT
+        page = meta["page_number"]
+        if page is None:
+            del meta["page_number"]
+            return self._NONE
+        if type(page) is int and 0 <= page <= self._PAGE_MAX:
+            del meta["page_number"]
+            return page
+        return self._ABSENT
+
+    def _take_string(self, meta: Dict[str, Any], key: str) -> int:
+        """Pop a string (or None) ``key`` from ``meta`` and return its interned id."""
+        if key not in meta:
+            return self._ABSENT
+        value = meta[key]
+        if value is not None and not isinstance(value, str):
+            return self._ABSENT
+        del meta[key]
+        return self._intern(value)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Append documents keyed by docstore id."""
+        overlapping = set(texts).intersection(self.rows)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        for key, doc in texts.items():
+            row = len(self.keys)
+            meta = dict(doc.metadata)
+            # ChatService uses the child doc_id as the docstore id; store it once.
+            key_is_doc_id = meta.get("doc_id") == key
+            if key_is_doc_id:
+                del meta["doc_id"]
+
+            self.page.append(self._take_page(meta))
+            self.source_ids.append(self._take_string(meta, "source"))
+            self.modality_ids.append(self._take_string(meta, "modality"))
+            self.key_is_doc_id.append(key_is_doc_id)
+            self.text_buf += doc.page_content.encode("utf-8")
+            self.text_offsets.append(len(self.text_buf))
+            if meta:
+                self.extra[row] = meta
+            # Publish the key last so readers never see a row without columns.
+            self.keys.append(key)
+            self.rows[key] = row
+
+    def delete(self, ids: List) -> None:
+        """Forget ids; their column slots are left in place."""
+        overlapping = set(ids).intersection(self.rows)
+        if not overlapping:
+            raise ValueError(f"Tried to delete ids that does not  exist: {ids}")
+        for _id in ids:
+            row = self.rows.pop(_id, None)
+            if row is not None:
+                self.extra.pop(row, None)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Rebuild the document stored under ``search``."""
+        row = self.rows.get(search)
+        if row is None:
+            return f"ID {search} not found."
+
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        metadata: Dict[str, Any] = {}
+        if self.key_is_doc_id[row]:
+            metadata["doc_id"] = search
+        modality = self.modality_ids[row]
+        if modality != self._ABSENT:
+            metadata["modality"] = self._lookup(modality)
+        source = self.source_ids[row]
+        if source != self._ABSENT:
+            metadata["source"] = self._lookup(source)
+        page = self.page[row]
+        if page != self._ABSENT:
+            metadata["page_number"] = None if page == self._NONE else page
+        metadata.update(self.extra.get(row, {}))
+        # Decode from a copy: a live memoryview would block concurrent appends.
+        text = self.text_buf[start:end].decode("utf-8")
+        return Document(id=search, page_content=text, metadata=metadata)